@@ -10,38 +10,95 @@ Usage: ./hello_world | python3 parse_bundle.py
 
 import sys
 import re
+import functools
 from collections import defaultdict
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, Iterator, List, Tuple, Optional
+
+import numpy as np
+
+# stdin is scanned in chunks of this many characters
+READ_CHUNK_SIZE = 256 * 1024
+
+# Fields appear in the order emitted by lame_bundle_print() in runtime/lame_sched.c
+# The literal "[LAME][BUNDLE]" prefix lets the regex engine skip quickly to candidates.
+# Other LAME tag families should get their own compiled pattern rather than an
+# alternation in this one, which would lose that literal-prefix fast path.
+_BUNDLE_RE = re.compile(
+    r'\[LAME\]\[BUNDLE\]'
+    r'.*?\[kthread:(?P<kthread>\d+)\]'
+    r'.*?\[size:(?P<size>\d+)\]'
+    r'.*?\[used:(?P<used>\d+)\]'
+    r'(?:.*?\[active:(?P<active>\d+)\])?'
+    r'(?:.*?\[enabled:(?P<enabled>\d+)\])?'
+    r'.*?\[bundle:(?P<bundle>[^]\n]+)\]'
+)
 
 class BundleInfo:
+    __slots__ = ('size', 'used', 'active', 'enabled', 'bundle_str', 'uthreads')
+    
     def __init__(self):
         self.size = -1
         self.used = -1
         self.active = -1
         self.enabled = -1
         self.bundle_str = None
-        self.uthreads = []
+        self.uthreads: Tuple[str, ...] = ()
     
     def __str__(self):
         return f"Bundle(size={self.size}, used={self.used}, active={self.active}, enabled={self.enabled}, bundle={self.bundle_str})"
 
 class KthreadBundle:
+    __slots__ = ('kthread_id', '_fields', '_bundle_strs', '_n', 'validation_errors', 'entry_errors')
+    
+    # Rows of _fields
+    SIZE, USED, ACTIVE, ENABLED = range(4)
+    
     def __init__(self, kthread_id: int):
         self.kthread_id = kthread_id
-        self.bundles: List[BundleInfo] = []
+        # Bundle history stored column-wise: one int64 row per numeric field,
+        # grown by doubling; BundleInfo objects are rebuilt on demand
+        self._fields = np.empty((4, 64), dtype=np.int64)
+        self._bundle_strs: List[str] = []
+        self._n = 0
         self.validation_errors = False
         self.entry_errors = []
     
+    def __len__(self) -> int:
+        return self._n
+    
     def add_bundle(self, bundle: BundleInfo):
-        self.bundles.append(bundle)
+        if self._n == self._fields.shape[1]:
+            fields = np.empty((4, 2 * self._n), dtype=np.int64)
+            fields[:, :self._n] = self._fields
+            self._fields = fields
+        self._fields[:, self._n] = (bundle.size, bundle.used, bundle.active, bundle.enabled)
+        self._bundle_strs.append(bundle.bundle_str)
+        self._n += 1
+    
+    @property
+    def useds(self) -> np.ndarray:
+        """'used' of every bundle entry, in log order."""
+        return self._fields[self.USED, :self._n]
+    
+    def get_bundle(self, i: int) -> BundleInfo:
+        size, used, active, enabled = self._fields[:, i].tolist()
+        bundle = BundleInfo()
+        bundle.size = size
+        bundle.used = used
+        bundle.active = active
+        bundle.enabled = enabled
+        bundle.bundle_str = self._bundle_strs[i]
+        bundle.uthreads = parse_bundle_string(bundle.bundle_str)
+        return bundle
     
     def get_last_bundle(self) -> Optional[BundleInfo]:
-        return self.bundles[-1] if self.bundles else None
+        return self.get_bundle(self._n - 1) if self._n else None
 
-def parse_bundle_string(bundle_str: str) -> List[str]:
-    """Parse bundle string to extract uthread addresses."""
+@functools.lru_cache(maxsize=4096)
+def parse_bundle_string(bundle_str: str) -> Tuple[str, ...]:
+    """Parse bundle string to extract uthread addresses (cached, so immutable)."""
     if not bundle_str:
-        return []
+        return ()
     
     # Remove opening '<' if present
     if bundle_str.startswith('<'):
@@ -54,44 +111,48 @@ def parse_bundle_string(bundle_str: str) -> List[str]:
         if item == "(nil)" or item.startswith("0x"):
             uthreads.append(item)
     
-    return uthreads
+    return tuple(uthreads)
 
-def parse_bundle_line(line: str) -> Optional[Tuple[int, BundleInfo]]:
-    """Parse a LAME bundle line and return (kthread_id, bundle_info)."""
-    # Look for LAME bundle pattern
-    if "[LAME][BUNDLE]" not in line:
-        return None
+def iter_bundle_matches(stream) -> Iterator[Tuple[int, re.Match]]:
+    """Scan stream in large chunks and yield (line_num, match) for bundle lines."""
+    line_num = 1  # line number at the start of the current chunk
+    tail = ""
+    while True:
+        chunk = stream.read(READ_CHUNK_SIZE)
+        if chunk:
+            # Only scan complete lines; carry the partial last line over
+            data = tail + chunk
+            cut = data.rfind("\n") + 1
+            if cut == 0:
+                tail = data
+                continue
+            data, tail = data[:cut], data[cut:]
+        else:
+            data, tail = tail, ""
+        
+        pos = 0
+        for match in _BUNDLE_RE.finditer(data):
+            line_num += data.count("\n", pos, match.start())
+            pos = match.start()
+            yield line_num, match
+        line_num += data.count("\n", pos)
+        
+        if not chunk:
+            return
+
+def bundle_from_match(match: re.Match) -> Optional[Tuple[int, BundleInfo]]:
+    """Build (kthread_id, bundle_info) from a _BUNDLE_RE match."""
+    kthread_id = int(match.group('kthread'))
     
     bundle = BundleInfo()
-    
-    # Extract kthread ID
-    kthread_match = re.search(r'\[kthread:(\d+)\]', line)
-    if not kthread_match:
-        return None
-    kthread_id = int(kthread_match.group(1))
-    
-    # Extract other fields using regex
-    size_match = re.search(r'\[size:(\d+)\]', line)
-    if size_match:
-        bundle.size = int(size_match.group(1))
-    
-    used_match = re.search(r'\[used:(\d+)\]', line)
-    if used_match:
-        bundle.used = int(used_match.group(1))
-    
-    active_match = re.search(r'\[active:(\d+)\]', line)
-    if active_match:
-        bundle.active = int(active_match.group(1))
-    
-    enabled_match = re.search(r'\[enabled:(\d+)\]', line)
-    if enabled_match:
-        bundle.enabled = int(enabled_match.group(1))
-    
-    # Extract bundle string
-    bundle_match = re.search(r'\[bundle:([^]]+)\]', line)
-    if bundle_match:
-        bundle.bundle_str = bundle_match.group(1)
-        bundle.uthreads = parse_bundle_string(bundle.bundle_str)
+    bundle.size = int(match.group('size'))
+    bundle.used = int(match.group('used'))
+    if match.group('active') is not None:
+        bundle.active = int(match.group('active'))
+    if match.group('enabled') is not None:
+        bundle.enabled = int(match.group('enabled'))
+    bundle.bundle_str = match.group('bundle')
+    bundle.uthreads = parse_bundle_string(bundle.bundle_str)
     
     # Validate that we have the required fields
     if bundle.size < 0 or bundle.used < 0 or bundle.bundle_str is None:
@@ -99,63 +160,65 @@ def parse_bundle_line(line: str) -> Optional[Tuple[int, BundleInfo]]:
     
     return kthread_id, bundle
 
-def validate_bundle(bundle: BundleInfo, line_num: int) -> bool:
-    """Validate bundle consistency."""
+def validate_bundle(bundle: BundleInfo, line_num: int, out: List[str]) -> bool:
+    """Validate bundle consistency, appending error lines to out."""
     valid = True
     
     # Check 1: used <= size
     if bundle.used > bundle.size:
-        print(f"ERROR line {line_num}: used ({bundle.used}) > size ({bundle.size})")
+        out.append(f"ERROR line {line_num}: used ({bundle.used}) > size ({bundle.size})\n")
         valid = False
     
     # Check 2: bundle field has exactly "used" many non-nil uthreads
-    non_nil_count = sum(1 for uthread in bundle.uthreads if uthread != "(nil)")
+    non_nil_count = len(bundle.uthreads) - bundle.uthreads.count("(nil)")
     if non_nil_count != bundle.used:
-        print(f"ERROR line {line_num}: bundle has {non_nil_count} non-nil uthreads but used={bundle.used}")
+        out.append(f"ERROR line {line_num}: bundle has {non_nil_count} non-nil uthreads but used={bundle.used}\n")
         valid = False
     
     return valid
 
-def validate_kthread_lifecycle(kthread: KthreadBundle) -> bool:
-    """Validate kthread bundle lifecycle."""
+def validate_kthread_lifecycle(kthread: KthreadBundle, out: List[str]) -> bool:
+    """Validate kthread bundle lifecycle, appending error lines to out."""
     valid = True
     
-    if len(kthread.bundles) < 2:
+    if len(kthread) < 2:
         return True  # Need at least 2 entries to check growth
     
     # Check 1: bundle never grows for more than two consecutive times
-    consecutive_growth = 0
-    for i in range(1, len(kthread.bundles)):
-        if kthread.bundles[i].used > kthread.bundles[i-1].used:
-            consecutive_growth += 1
-            if consecutive_growth > 2:
-                print(f"ERROR kthread {kthread.kthread_id}: bundle grew for {consecutive_growth} consecutive times (entry {i + 1})")
-                valid = False
-                kthread.entry_errors.append(i)
-        else:
-            consecutive_growth = 0
+    # growth[t] is set when entry t + 1 grew over entry t; run[t] is the length
+    # of the growth streak ending at t
+    used = kthread.useds
+    growth = np.diff(used) > 0
+    idx = np.arange(len(growth))
+    last_reset = np.maximum.accumulate(np.where(growth, -1, idx))
+    run = idx - last_reset
+    for t in np.flatnonzero(run > 2).tolist():
+        i = t + 1
+        out.append(f"ERROR kthread {kthread.kthread_id}: bundle grew for {run[t]} consecutive times (entry {i + 1})\n")
+        valid = False
+        kthread.entry_errors.append(i)
     
     # Check 2: bundle ends up empty
-    if kthread.bundles:
-        last_bundle = kthread.bundles[-1]
+    last_bundle = kthread.get_last_bundle()
+    if last_bundle is not None:
         if last_bundle.used != 0:
-            print(f"ERROR kthread {kthread.kthread_id}: bundle does not end empty (used={last_bundle.used} in last entry)")
+            out.append(f"ERROR kthread {kthread.kthread_id}: bundle does not end empty (used={last_bundle.used} in last entry)\n")
             valid = False
-            kthread.entry_errors.append(len(kthread.bundles) - 1)
+            kthread.entry_errors.append(len(kthread) - 1)
     
     return valid
 
 def print_kthread_summary(kthread: KthreadBundle):
     """Print kthread bundle summary."""
     print(f"\n=== KTHREAD {kthread.kthread_id} ===")
-    print(f"Total Bundle Entries: {len(kthread.bundles)}")
+    print(f"Total Bundle Entries: {len(kthread)}")
     print(f"Validation Status: {'FAILED' if kthread.validation_errors else 'PASSED'}")
     
     if kthread.validation_errors and kthread.entry_errors:
         print("Bundle History with Errors:")
         for i in kthread.entry_errors:
-            if i < len(kthread.bundles):
-                bundle = kthread.bundles[i]
+            if i < len(kthread):
+                bundle = kthread.get_bundle(i)
                 print(f"  {i + 1:2d}: size={bundle.size} used={bundle.used} active={bundle.active} enabled={bundle.enabled} bundle={bundle.bundle_str} [ERROR]")
     print("==================")
 
@@ -164,43 +227,44 @@ def main():
     
     # Dictionary to store kthread bundles
     kthreads: Dict[int, KthreadBundle] = {}
-    line_num = 0
+    # Output produced while parsing is buffered and written once
+    out: List[str] = []
     
     print("LAME Bundle Log Parser")
     print("Reading from stdin...\n")
     
-    # Read lines from stdin
-    for line in sys.stdin:
-        line_num += 1
-        
-        # Look for LAME bundle lines
-        if "[LAME][BUNDLE]" in line:
-            result = parse_bundle_line(line)
-            if result:
-                kthread_id, bundle = result
-                
-                # Get or create kthread bundle
-                if kthread_id not in kthreads:
-                    kthreads[kthread_id] = KthreadBundle(kthread_id)
-                kthread = kthreads[kthread_id]
-                
-                # Validate bundle consistency
-                bundle_valid = validate_bundle(bundle, line_num)
-                if not bundle_valid:
-                    print(f"Bundle validation failed at line {line_num}")
-                
-                # Add to kthread history
-                kthread.add_bundle(bundle)
-                
-                # Mark error if validation failed
-                if not bundle_valid:
-                    kthread.entry_errors.append(len(kthread.bundles) - 1)
+    # Scan stdin for LAME bundle lines
+    for line_num, match in iter_bundle_matches(sys.stdin):
+        result = bundle_from_match(match)
+        if result:
+            kthread_id, bundle = result
+            
+            # Get or create kthread bundle
+            if kthread_id not in kthreads:
+                kthreads[kthread_id] = KthreadBundle(kthread_id)
+            kthread = kthreads[kthread_id]
+            
+            # Validate bundle consistency
+            bundle_valid = validate_bundle(bundle, line_num, out)
+            if not bundle_valid:
+                out.append(f"Bundle validation failed at line {line_num}\n")
+            
+            # Add to kthread history
+            kthread.add_bundle(bundle)
+            
+            # Mark error if validation failed
+            if not bundle_valid:
+                kthread.entry_errors.append(len(kthread) - 1)
+    
+    sys.stdout.write("".join(out))
     
     # Validate kthread lifecycles
     print("\n=== BUNDLE LIFECYCLE VALIDATION ===")
+    out = []
     for kthread in kthreads.values():
-        if not validate_kthread_lifecycle(kthread):
+        if not validate_kthread_lifecycle(kthread, out):
             kthread.validation_errors = True
+    sys.stdout.write("".join(out))
     
     # Print summaries
     print("\n=== BUNDLE SUMMARY ===")